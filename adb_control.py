@@ -8,11 +8,12 @@ ADB控制脚本 - 用于通过ADB命令控制Android设备
 主要用于自动化测试或重复性操作。支持多种设备操作和灵活的配置参数。
 
 使用方法:
-    python adb_control.py [循环次数]
+    python adb_control.py [循环次数] [选项]
     
 示例:
     python adb_control.py 100  # 执行100次操作循环
     python adb_control.py      # 使用默认循环次数(300次)
+    python adb_control.py -h   # 查看所有选项
 
 作者: Mcode
 日期: 2025-09-25
@@ -22,9 +23,23 @@ ADB控制脚本 - 用于通过ADB命令控制Android设备
 import subprocess
 import time
 import sys  # 用于sys.exit()和命令行参数处理
+import os
 import logging
-import argparse  # 优化1: 添加argparse模块支持更好的命令行参数处理 (2025-09-25)
-from typing import Optional, Tuple, List
+import logging.handlers
+import atexit
+import queue
+import threading
+import re
+import math
+import shlex
+import struct
+import types
+from typing import Optional, Tuple, List, Dict, Set, Mapping, NamedTuple, Union
+# asyncio和tempfile只在执行操作循环时用到，在使用它们的函数内按需导入以缩短启动时间
+
+
+# 模块日志记录器，日志参数在输出时才格式化，级别被过滤的日志不产生格式化开销
+logger = logging.getLogger(__name__)
 
 
 # ==================== 配置参数 ====================
@@ -40,14 +55,32 @@ class Config:
     DEFAULT_REPEAT_COUNT = 300
     
     # 时间间隔配置（单位：秒）
-    DEVICE_READY_WAIT = 2.0      # 设备准备等待时间
-    ANIMATION_WAIT = 1.0         # 动画完成等待时间
+    ANIMATION_WAIT = 1.0         # 动画完成等待时间（未配置TARGET_PACKAGE时使用）
     OPERATION_INTERVAL = 0.5     # 操作间隔时间
     CLICK_INTERVAL = 1.0         # 点击操作间隔时间
     
+    # 点击重试配置（逐次点击时，单次点击失败后的重试）
+    CLICK_MAX_RETRIES = 1        # 单次点击的最大重试次数
+    CLICK_RETRY_INTERVAL = 0.5   # 点击重试间隔时间
+    
+    # 窗口焦点等待配置: 配置目标应用包名后，滑动后改为轮询等待该应用窗口获得焦点，
+    # 窗口就绪即继续执行，而不是固定等待ANIMATION_WAIT
+    TARGET_PACKAGE = None        # 目标应用包名，如"com.example.app"
+    WINDOW_WAIT_TIMEOUT = 2.0    # 等待窗口焦点的超时时间
+    WINDOW_POLL_INTERVAL = 0.05  # 窗口焦点轮询间隔
+    
     # 滑动操作配置
     DEFAULT_SWIPE_DURATION = 300  # 默认滑动持续时间（毫秒）
     
+    # 点击方式配置: 为True时通过sendevent直接写入触摸事件，绕过启动较慢的input命令
+    # 未识别到触摸屏设备或屏幕处于旋转状态时自动回退为input tap
+    USE_SENDEVENT = True
+    
+    # 为True时单次点击通过'adb exec-in'把事件结构体直接写入触摸屏设备节点，
+    # 设备节点不可写（如SELinux限制）或adb不支持exec-in时自动回退为shell命令点击
+    # 写入成功只表示数据已交给adb，无法确认设备端已注入事件，因此默认关闭
+    USE_RAW_EVENTS = False
+    
     # 屏幕分辨率配置（可根据实际设备调整）
     SCREEN_WIDTH = 1080
     SCREEN_HEIGHT = 1920
@@ -63,6 +96,24 @@ class Config:
         (770, 2300),
         (939, 2525)
     ]
+    
+    # 预定义坐标在类定义时校验一次，操作时不再逐次校验
+    for _x, _y in [SWIPE_COORDINATES['start'], SWIPE_COORDINATES['end'], *CLICK_COORDINATES]:
+        if not (isinstance(_x, int) and isinstance(_y, int) and _x >= 0 and _y >= 0):
+            raise ValueError(f"预定义坐标必须为非负整数: ({_x}, {_y})")
+    del _x, _y
+    
+    # 预定义操作对应的shell命令，在类定义时生成一次，循环中直接使用
+    SWIPE_COMMAND = (f"input swipe {SWIPE_COORDINATES['start'][0]} {SWIPE_COORDINATES['start'][1]} "
+                     f"{SWIPE_COORDINATES['end'][0]} {SWIPE_COORDINATES['end'][1]} {DEFAULT_SWIPE_DURATION}")
+    CLICK_COMMANDS = [f"input tap {x} {y}" for x, y in CLICK_COORDINATES]
+    
+    # 设备端批量执行时，循环脚本在设备上的存放路径
+    DEVICE_SCRIPT_PATH = "/data/local/tmp/adb_control_loop.sh"
+    
+    # 控制台日志缓冲配置: 日志先缓存在内存中，缓冲区满、出现ERROR日志或到达刷新间隔时统一输出
+    LOG_BUFFER_CAPACITY = 64     # 缓冲的日志条数
+    LOG_FLUSH_INTERVAL = 1.0     # 定时刷新间隔（秒）
 
 
 # ==================== 日志配置 ====================
@@ -80,20 +131,67 @@ def setup_logging():
     )
 
 
+class BufferedLogHandler(logging.handlers.MemoryHandler):
+    """
+    带定时刷新的缓冲日志处理器
+    
+    在MemoryHandler的基础上增加后台定时刷新: 缓冲区满、出现flushLevel及以上级别的日志时立即输出，
+    此外后台线程每隔flush_interval秒把缓冲的日志一并交给目标处理器输出，
+    避免循环中每条日志都单独写一次控制台，同时保证等待设备等阻塞操作前的日志能及时显示。
+    """
+    
+    def __init__(self, capacity: int, flush_interval: float, 
+                 flushLevel: int = logging.ERROR, target: logging.Handler = None):
+        super().__init__(capacity, flushLevel=flushLevel, target=target)
+        self.flush_interval = flush_interval
+        self._stop_event = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+        self._flusher.start()
+    
+    def _flush_periodically(self):
+        """刷新线程: 每隔flush_interval秒输出一次缓冲的日志，直到处理器关闭"""
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+    
+    def close(self):
+        self._stop_event.set()
+        super().close()
+
+
 # ==================== 核心ADB操作函数 ====================
-def run_adb_command(command: str, timeout: int = 30) -> Optional[str]:
+# 已确认连接状态的设备ID（None表示未指定设备）: 启动时检查一次，之后只在该设备的ADB命令失败时移除并重新检查
+# 多个设备的工作线程共用，读写时加锁
+_checked_devices: Set[Optional[str]] = set()
+_checked_devices_lock = threading.Lock()
+
+
+def _uncheck_device(device_id: Optional[str]):
+    """ADB命令失败后标记设备需要重新检查连接状态（device_id为None时所有设备都重新检查）"""
+    with _checked_devices_lock:
+        if device_id is None:
+            _checked_devices.clear()
+        else:
+            _checked_devices.discard(device_id)
+
+
+def run_adb_command(command: Union[str, List[str]], timeout: int = 30, 
+                    capture: bool = False) -> Optional[str]:
     """
     执行ADB命令并返回结果
     
     这是所有ADB操作的基础函数，负责执行具体的ADB命令并处理可能的错误。
-    使用subprocess模块确保命令执行的安全性和稳定性。
+    命令以参数列表的形式直接启动adb进程，不经过本地shell，既省去一次额外的进程创建，
+    也避免了参数中特殊字符被本地shell解析。
     
     参数:
-        command (str): 要执行的ADB命令（不包含'adb'前缀）
+        command (str | List[str]): 要执行的ADB命令（不包含'adb'前缀），
+            字符串形式会按shell规则拆分为参数列表；参数中包含Windows路径等反斜杠时请直接传入列表
         timeout (int): 命令执行超时时间（秒），默认30秒
+        capture (bool): 是否捕获命令输出，默认False。只需根据退出码判断成败的命令
+            （如push、wait-for-device）不捕获输出，标准输出和错误输出直接丢弃
         
     返回:
-        str: 命令执行的输出结果，如果成功的话
+        str: 命令执行的输出结果（不捕获输出时为空字符串），如果成功的话
         None: 如果命令执行失败或超时
         
     异常处理:
@@ -101,73 +199,89 @@ def run_adb_command(command: str, timeout: int = 30) -> Optional[str]:
         - TimeoutExpired: 命令执行超时
         - Exception: 其他未预期的错误
     """
-    full_command = f"adb {command}"
-    logging.info(f"执行ADB命令: {full_command}")
+    args = ["adb"] + (command if isinstance(command, list) else shlex.split(command))
+    full_command = " ".join(args)
+    logger.info("执行ADB命令: %s", full_command)
+    
+    output_stream = subprocess.PIPE if capture else subprocess.DEVNULL
     
     try:
         # 使用subprocess执行ADB命令，设置超时和错误处理
         result = subprocess.run(
-            full_command, 
-            shell=True, 
+            args, 
             check=True,
-            stdout=subprocess.PIPE, 
-            stderr=subprocess.PIPE, 
+            stdout=output_stream, 
+            stderr=output_stream, 
             text=True,
             timeout=timeout
         )
         
-        if result.stdout.strip():
-            logging.debug(f"命令输出: {result.stdout.strip()}")
+        if not capture:
+            return ""
+        
+        if logger.isEnabledFor(logging.DEBUG) and result.stdout.strip():
+            logger.debug("命令输出: %s", result.stdout.strip())
         
         return result.stdout
         
     except subprocess.CalledProcessError as e:
+        # 命令失败可能是设备断开，下次循环重新检查该设备的连接
+        _uncheck_device(args[2] if args[1:2] == ["-s"] else None)
+        
         error_msg = f"ADB命令执行失败: {e}"
         if e.stderr:
             error_msg += f"\n错误详情: {e.stderr.strip()}"
-        logging.error(error_msg)
+        logger.error(error_msg)
         return None
         
     except subprocess.TimeoutExpired:
-        logging.error(f"ADB命令执行超时 (>{timeout}秒): {full_command}")
+        logger.error("ADB命令执行超时 (>%s秒): %s", timeout, full_command)
         return None
         
     except Exception as e:
-        logging.error(f"执行ADB命令时发生未知错误: {e}")
+        logger.error("执行ADB命令时发生未知错误: %s", e)
         return None
 
 
-def check_device_connected() -> bool:
+# 设备状态说明（用于日志显示）
+_DEVICE_STATUS_DESC: Mapping[str, str] = types.MappingProxyType({
+    'device': '已连接并授权',
+    'unauthorized': '未授权',
+    'offline': '离线'
+})
+
+
+def get_available_devices() -> List[str]:
     """
-    检查是否有设备连接到ADB
+    获取所有可用设备的ID列表
     
     通过执行'adb devices'命令来检测当前连接的Android设备。
     该函数会解析命令输出，统计连接的设备数量并显示设备信息。
     
     返回:
-        bool: 如果有设备连接则返回True，否则返回False
+        List[str]: 状态为'device'（已连接并授权）的设备ID列表，没有可用设备时为空列表
         
     注意:
         - 设备必须已启用USB调试模式
         - 设备状态应为'device'而非'unauthorized'或'offline'
     """
-    logging.info("检查设备连接状态...")
-    result = run_adb_command("devices")
+    logger.info("检查设备连接状态...")
+    result = run_adb_command("devices", capture=True)
     
     if not result:
-        logging.error("无法执行adb devices命令，请检查ADB是否正确安装")
-        return False
+        logger.error("无法执行adb devices命令，请检查ADB是否正确安装")
+        return []
     
     # 解析设备列表（跳过第一行标题"List of devices attached"）
     lines = result.strip().split('\n')
     if len(lines) <= 1:
-        logging.warning("没有检测到已连接的设备")
+        logger.warning("没有检测到已连接的设备")
         print("\n请确保:")
         print("1. 设备已通过USB连接到计算机")
         print("2. 设备已启用USB调试模式")
         print("3. 已授权计算机进行USB调试")
         print("4. ADB驱动程序已正确安装")
-        return False
+        return []
     
     # 提取有效的设备信息
     devices = []
@@ -177,31 +291,613 @@ def check_device_connected() -> bool:
             devices.append((device_id.strip(), status.strip()))
     
     if not devices:
-        logging.warning("没有检测到有效的设备连接")
-        return False
+        logger.warning("没有检测到有效的设备连接")
+        return []
     
     # 显示设备信息
-    logging.info(f"检测到 {len(devices)} 个已连接设备:")
+    logger.info("检测到 %s 个已连接设备:", len(devices))
     for device_id, status in devices:
-        status_desc = {
-            'device': '已连接并授权',
-            'unauthorized': '未授权',
-            'offline': '离线'
-        }.get(status, status)
-        logging.info(f"  - 设备ID: {device_id}, 状态: {status_desc}")
+        status_desc = _DEVICE_STATUS_DESC.get(status, status)
+        logger.info("  - 设备ID: %s, 状态: %s", device_id, status_desc)
     
     # 检查是否有可用设备
-    available_devices = [d for d in devices if d[1] == 'device']
+    available_devices = [device_id for device_id, status in devices if status == 'device']
     if not available_devices:
-        logging.error("没有可用的设备（所有设备都未授权或离线）")
+        logger.error("没有可用的设备（所有设备都未授权或离线）")
+    
+    return available_devices
+
+
+def check_device_connected(device_id: Optional[str] = None) -> bool:
+    """
+    检查是否有设备连接到ADB
+    
+    参数:
+        device_id (str, optional): 要检查的设备ID，为None时只要有任一可用设备即可
+        
+    返回:
+        bool: 如果有设备连接（或指定设备可用）则返回True，否则返回False
+    """
+    available_devices = get_available_devices()
+    if device_id is None:
+        return bool(available_devices)
+    
+    if device_id not in available_devices:
+        logger.error("指定的设备不可用: %s", device_id)
         return False
     
     return True
 
 
+# ==================== 触摸事件 ====================
+# Linux输入事件类型及代码（参见 linux/input-event-codes.h）
+EV_SYN = 0x00
+EV_KEY = 0x01
+EV_ABS = 0x03
+SYN_REPORT = 0x00
+BTN_TOUCH = 0x14a
+ABS_MT_POSITION_X = 0x35
+ABS_MT_POSITION_Y = 0x36
+ABS_MT_TRACKING_ID = 0x39
+
+
+class TouchScreen(NamedTuple):
+    """
+    触摸屏输入设备信息
+    
+    属性:
+        device (str): 输入设备节点，如 /dev/input/event2
+        scale_x (float): 屏幕X坐标到触摸屏原始坐标的缩放比例
+        scale_y (float): 屏幕Y坐标到触摸屏原始坐标的缩放比例
+        has_btn_touch (bool): 设备是否上报BTN_TOUCH按键事件
+        
+    坐标换算假定屏幕未旋转（SurfaceOrientation为0），旋转状态下屏幕坐标与触摸屏原始坐标的轴向不一致。
+    """
+    device: str
+    scale_x: float
+    scale_y: float
+    has_btn_touch: bool
+    
+    def tap_events(self, x: int, y: int) -> List[Tuple[int, int, int]]:
+        """
+        构建一次点击对应的输入事件列表，每个事件为(类型, 代码, 值)
+        
+        按下: TRACKING_ID=0、POSITION_X、POSITION_Y、SYN_REPORT
+        抬起: TRACKING_ID=-1、SYN_REPORT
+        设备上报BTN_TOUCH时同时发送按下/抬起的按键事件。
+        """
+        raw_x = round(x * self.scale_x)
+        raw_y = round(y * self.scale_y)
+        
+        events = [(EV_ABS, ABS_MT_TRACKING_ID, 0)]
+        if self.has_btn_touch:
+            events.append((EV_KEY, BTN_TOUCH, 1))
+        events += [
+            (EV_ABS, ABS_MT_POSITION_X, raw_x),
+            (EV_ABS, ABS_MT_POSITION_Y, raw_y),
+            (EV_SYN, SYN_REPORT, 0),
+            (EV_ABS, ABS_MT_TRACKING_ID, -1)
+        ]
+        if self.has_btn_touch:
+            events.append((EV_KEY, BTN_TOUCH, 0))
+        events.append((EV_SYN, SYN_REPORT, 0))
+        
+        return events
+    
+    def tap_command(self, x: int, y: int) -> str:
+        """构建一次点击对应的sendevent命令序列"""
+        return " && ".join(f"sendevent {self.device} {ev_type} {code} {value}"
+                           for ev_type, code, value in self.tap_events(x, y))
+
+
+def parse_touch_screen(getevent_output: str, 
+                       screen_size: Optional[Tuple[int, int]] = None) -> Optional[TouchScreen]:
+    """
+    从'getevent -pl'的输出中找出触摸屏设备
+    
+    选择第一个同时上报ABS_MT_POSITION_X和ABS_MT_POSITION_Y的输入设备，
+    并根据坐标最大值与屏幕分辨率计算缩放比例。
+    
+    参数:
+        getevent_output (str): 'getevent -pl'命令的输出
+        screen_size (Tuple[int, int], optional): 屏幕分辨率(宽, 高)，为None时不缩放
+        
+    返回:
+        TouchScreen: 触摸屏设备信息
+        None: 如果没有找到触摸屏设备
+    """
+    devices = []
+    for line in getevent_output.splitlines():
+        match = re.match(r"add device \d+: (\S+)", line)
+        if match:
+            devices.append({'device': match.group(1), 'max': {}, 'btn_touch': False})
+            continue
+        if not devices:
+            continue
+        
+        if 'BTN_TOUCH' in line:
+            devices[-1]['btn_touch'] = True
+        match = re.search(r"ABS_MT_POSITION_([XY])\s*:.*\bmax (\d+)", line)
+        if match:
+            devices[-1]['max'][match.group(1)] = int(match.group(2))
+    
+    for info in devices:
+        if 'X' in info['max'] and 'Y' in info['max']:
+            scale_x = scale_y = 1.0
+            if screen_size:
+                scale_x = (info['max']['X'] + 1) / screen_size[0]
+                scale_y = (info['max']['Y'] + 1) / screen_size[1]
+            return TouchScreen(info['device'], scale_x, scale_y, info['btn_touch'])
+    
+    return None
+
+
+def parse_surface_orientation(dumpsys_output: str) -> Optional[int]:
+    """
+    从'dumpsys input'的输出中读取屏幕方向
+    
+    参数:
+        dumpsys_output (str): 'dumpsys input'命令的输出（可只包含SurfaceOrientation所在行）
+        
+    返回:
+        int: 屏幕方向，0为未旋转，1/2/3分别为旋转90/180/270度
+        None: 如果输出中没有方向信息
+    """
+    match = re.search(r"SurfaceOrientation:\s*(\d)", dumpsys_output)
+    return int(match.group(1)) if match else None
+
+
+class RawTouchWriter:
+    """
+    触摸事件直写通道
+    
+    通过'adb exec-in "cat > /dev/input/eventN"'保持一个到触摸屏设备节点的二进制管道，
+    点击时直接写入打包好的input_event结构体，由内核驱动分发，
+    设备端不再为每个事件启动sendevent或input进程。
+    （'adb exec-out'只转发设备端输出，不转发主机标准输入，不能用于写入。）
+    
+    input_event结构体为 struct timeval + __u16 type + __u16 code + __s32 value，
+    timeval的大小取决于设备用户空间的位数；时间戳由内核在写入时重新设置，这里填0即可。
+    
+    写入在后台线程中进行，设备端停止读取导致管道写满时，tap()在WRITE_TIMEOUT秒后返回False，
+    不会一直阻塞。
+    """
+    
+    # 64位/32位设备上的input_event结构体格式（Android设备均为小端序）
+    EVENT_FORMAT_64 = "<qqHHi"
+    EVENT_FORMAT_32 = "<iiHHi"
+    
+    # 启动后等待设备端cat进程报错退出的时间（秒）
+    STARTUP_CHECK_TIMEOUT = 0.2
+    
+    # 单次点击写入管道的超时时间（秒）
+    WRITE_TIMEOUT = 2.0
+    
+    # 检查'adb exec-in'是否转发标准输入时使用的设备端临时文件
+    PROBE_PATH = "/data/local/tmp/adb_control_exec_in_probe"
+    
+    def __init__(self, device_id: Optional[str], touch_screen: TouchScreen, is_64bit: bool):
+        self.touch_screen = touch_screen
+        self._event = struct.Struct(self.EVENT_FORMAT_64 if is_64bit else self.EVENT_FORMAT_32)
+        
+        self.proc = subprocess.Popen(
+            self.exec_in_args(device_id, f"cat > {touch_screen.device}"),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            bufsize=0
+        )
+        
+        # 预定义坐标的事件数据预先打包
+        self._packed_taps = {(x, y): self.pack_tap(x, y) for x, y in Config.CLICK_COORDINATES}
+        
+        # 后台写入线程: 从队列取出数据写入管道，每次写入完成后置位_written
+        self._pending = queue.Queue()
+        self._written = threading.Event()
+        self._write_ok = False
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+    
+    @staticmethod
+    def exec_in_args(device_id: Optional[str], command: str) -> List[str]:
+        """构建把主机标准输入转发给设备端命令的adb参数列表"""
+        args = ["adb"]
+        if device_id:
+            args += ["-s", device_id]
+        return args + ["exec-in", command]
+    
+    def pack_tap(self, x: int, y: int) -> bytes:
+        """将一次点击的事件序列打包为二进制数据"""
+        return b"".join(self._event.pack(0, 0, ev_type, code, value)
+                        for ev_type, code, value in self.touch_screen.tap_events(x, y))
+    
+    def started(self) -> bool:
+        """
+        检查写入通道是否成功启动
+        
+        设备端cat无法打开设备节点时adb进程会很快退出，这里等待STARTUP_CHECK_TIMEOUT秒，
+        期间进程未退出即认为通道可用。
+        """
+        try:
+            self.proc.wait(timeout=self.STARTUP_CHECK_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            return True
+        return False
+    
+    def _write_loop(self):
+        """写入线程: 逐个写入队列中的数据，None表示结束"""
+        while True:
+            data = self._pending.get()
+            if data is None:
+                return
+            try:
+                self.proc.stdin.write(data)
+                self.proc.stdin.flush()
+                self._write_ok = True
+            except (OSError, ValueError):
+                self._write_ok = False
+            self._written.set()
+    
+    def tap(self, x: int, y: int) -> bool:
+        """
+        写入一次点击
+        
+        数据写入本地管道即视为成功，并不确认设备端已注入事件；
+        设备端cat中途退出时，退出前写入的点击仍会被计为成功，之后的写入返回False。
+        
+        返回:
+            bool: 数据是否在WRITE_TIMEOUT秒内写入管道（管道断开或写入超时时返回False）
+        """
+        data = self._packed_taps.get((x, y))
+        if data is None:
+            data = self.pack_tap(x, y)
+        
+        if self.proc.poll() is not None:
+            return False
+        
+        self._written.clear()
+        self._pending.put(data)
+        if not self._written.wait(self.WRITE_TIMEOUT):
+            # 设备端没有读取数据，结束进程使阻塞的写入返回
+            logger.error("触摸事件写入超时 (>%s秒)", self.WRITE_TIMEOUT)
+            self.proc.kill()
+            return False
+        return self._write_ok
+    
+    def close(self):
+        """关闭写入通道"""
+        self._pending.put(None)
+        if self.proc.poll() is None:
+            try:
+                self.proc.stdin.close()
+                self.proc.wait(timeout=5)
+            except (OSError, ValueError, subprocess.TimeoutExpired):
+                self.proc.kill()
+
+
+# ==================== 持久化Shell会话 ====================
+class AdbShell:
+    """
+    持久化的adb shell会话
+    
+    每个设备在整个程序运行期间只启动一个'adb shell'子进程，之后的设备命令都逐行写入其标准输入，
+    避免每次点击/滑动都重新创建adb进程并与adb server建立连接。
+    每条命令后追加一条哨兵回显，读到哨兵即表示该命令执行完毕，并从中解析出退出码。
+    
+    示例:
+        AdbShell.instance().run("input tap 500 500")
+        AdbShell.instance("emulator-5554").run("input keyevent 4")
+    """
+    
+    # 命令结束标记，回显格式为 __DONE__<退出码>
+    # 发送的命令中把标记拆写为 __DO""NE__，回显输入的shell（旧版PTY模式）不会误匹配
+    SENTINEL_COMMAND = 'echo __DO""NE__$?'
+    SENTINEL_PATTERN = re.compile(r"__DONE__(\d+)\s*$")
+    
+    # 按设备ID缓存的会话，None表示未指定设备
+    _instances: Dict[Optional[str], "AdbShell"] = {}
+    _instances_lock = threading.Lock()
+    
+    def __init__(self, device_id: Optional[str] = None):
+        self.device_id = device_id
+        
+        args = ["adb"]
+        if device_id:
+            args += ["-s", device_id]
+        args.append("shell")
+        
+        # 使用二进制管道并手动编解码，避免Windows文本模式把换行符转换为\r\n
+        self.proc = subprocess.Popen(
+            args,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=0
+        )
+        
+        # 后台线程持续读取输出，使run()可以按超时时间等待结果
+        self._lines = queue.Queue()
+        self._reader = threading.Thread(target=self._read_output, daemon=True)
+        self._reader.start()
+        
+        # 触摸屏信息在首次点击时探测，探测成功后预定义坐标的点击命令替换为sendevent序列
+        self._touch_probed = False
+        self._touch_screen = None
+        self._tap_commands = dict(zip(Config.CLICK_COORDINATES, Config.CLICK_COMMANDS))
+        # 事件直写通道在首次raw_tap()时才尝试打开，且只尝试一次
+        self._raw_writer = None
+        self._raw_writer_checked = False
+    
+    @classmethod
+    def instance(cls, device_id: Optional[str] = None) -> "AdbShell":
+        """获取指定设备共享的shell会话，会话不存在或已退出时重新创建"""
+        with cls._instances_lock:
+            shell = cls._instances.get(device_id)
+            if shell is None or not shell.is_alive():
+                shell = cls._instances[device_id] = cls(device_id)
+            return shell
+    
+    @classmethod
+    def close_all(cls):
+        """关闭所有设备的shell会话（程序退出时自动调用）"""
+        with cls._instances_lock:
+            for shell in cls._instances.values():
+                shell.close()
+            cls._instances.clear()
+    
+    def _read_output(self):
+        """读取线程: 将shell输出逐行放入队列，None表示输出结束"""
+        for raw_line in self.proc.stdout:
+            self._lines.put(raw_line.decode('utf-8', errors='replace'))
+        self._lines.put(None)
+    
+    def is_alive(self) -> bool:
+        """shell子进程是否仍在运行且会话未被关闭"""
+        return self.proc.poll() is None and not self.proc.stdin.closed
+    
+    def run(self, command: str, timeout: int = 30) -> Optional[str]:
+        """
+        在持久化shell中执行一条命令
+        
+        参数:
+            command (str): 要在设备上执行的shell命令（不包含'adb shell'前缀）
+            timeout (int): 等待命令完成的超时时间（秒），默认30秒
+            
+        返回:
+            str: 命令的输出结果，如果退出码为0的话
+            None: 如果命令执行失败、超时或shell会话已断开
+        """
+        if not self.send(command):
+            return None
+        return self.wait_result(command, timeout)
+    
+    def send(self, command: str) -> bool:
+        """
+        将命令写入shell但不等待其完成，之后需调用wait_result()读取结果
+        
+        返回:
+            bool: 命令是否成功写入
+        """
+        logger.info("执行Shell命令: %s", command)
+        
+        # 会话已因超时等原因关闭时stdin也已关闭，写入会抛出ValueError
+        if not self.is_alive():
+            logger.error("adb shell会话已关闭，无法执行命令: %s", command)
+            return False
+        
+        try:
+            self.proc.stdin.write(f"{command}; {self.SENTINEL_COMMAND}\n".encode('utf-8'))
+            self.proc.stdin.flush()
+            return True
+        except (OSError, ValueError) as e:
+            logger.error("写入adb shell失败: %s", e)
+            self.close()
+            return False
+    
+    def wait_result(self, command: str, timeout: int = 30) -> Optional[str]:
+        """
+        等待已通过send()写入的命令执行完毕并返回结果
+        
+        参数:
+            command (str): 对应的命令（用于错误日志）
+            timeout (int): 等待命令完成的超时时间（秒），默认30秒
+            
+        返回:
+            str: 命令的输出结果，如果退出码为0的话
+            None: 如果命令执行失败、超时或shell会话已断开
+        """
+        # 读取输出直到遇到哨兵
+        output = []
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                line = self._lines.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                # 超时后会话中残留未读取的输出，直接关闭，下次使用时重建
+                logger.error("Shell命令执行超时 (>%s秒): %s", timeout, command)
+                self.close()
+                return None
+            
+            if line is None:
+                _uncheck_device(self.device_id)
+                logger.error("adb shell会话意外结束，请检查设备连接")
+                return None
+            
+            match = self.SENTINEL_PATTERN.search(line)
+            if match is None:
+                output.append(line)
+                continue
+            
+            output.append(line[:match.start()])
+            exit_code = match.group(1)
+            break
+        
+        result = "".join(output)
+        if exit_code != "0":
+            error_msg = f"Shell命令执行失败 (退出码: {exit_code}): {command}"
+            if result.strip():
+                error_msg += f"\n错误详情: {result.strip()}"
+            logger.error(error_msg)
+            return None
+        
+        if logger.isEnabledFor(logging.DEBUG) and result.strip():
+            logger.debug("命令输出: %s", result.strip())
+        
+        return result
+    
+    def _probe_touch_screen(self):
+        """探测触摸屏设备，为Config.CLICK_COORDINATES预先生成点击命令"""
+        self._touch_probed = True
+        
+        output = self.run("getevent -pl")
+        if output is None:
+            logger.warning("无法获取输入设备信息，点击操作将使用input tap")
+            return
+        
+        # 'wm size'输出如"Physical size: 1080x2400"，存在覆盖分辨率时以最后一行为准
+        screen_size = None
+        sizes = re.findall(r"(\d+)x(\d+)", self.run("wm size") or "")
+        if sizes:
+            screen_size = (int(sizes[-1][0]), int(sizes[-1][1]))
+        
+        touch_screen = parse_touch_screen(output, screen_size)
+        if touch_screen is None:
+            logger.warning("未识别到触摸屏设备，点击操作将使用input tap")
+            return
+        
+        # 触摸屏原始坐标不随屏幕旋转，旋转状态下（如横屏应用）直接换算会点错位置
+        orientation = parse_surface_orientation(
+            self.run("dumpsys input | grep SurfaceOrientation || true") or "")
+        if orientation != 0:
+            logger.warning("屏幕方向为 %s（非0或无法确定），点击操作将使用input tap", orientation)
+            return
+        
+        self._touch_screen = touch_screen
+        logger.info("使用触摸屏设备: %s", self._touch_screen.device)
+        if Config.USE_SENDEVENT:
+            for x, y in Config.CLICK_COORDINATES:
+                self._tap_commands[(x, y)] = self._touch_screen.tap_command(x, y)
+    
+    def _check_exec_in(self) -> bool:
+        """
+        检查'adb exec-in'能否把主机数据写到设备端
+        
+        通过exec-in向设备端临时文件写入一段测试数据，再读取文件大小确认数据确实到达设备。
+        """
+        path = RawTouchWriter.PROBE_PATH
+        probe = bytes(64)
+        try:
+            subprocess.run(RawTouchWriter.exec_in_args(self.device_id, f"cat > {path}"),
+                           input=probe, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                           timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            return False
+        
+        size = self.run(f"wc -c < {path}; rm -f {path}")
+        return size is not None and size.strip() == str(len(probe))
+    
+    def _open_raw_writer(self):
+        """检查触摸屏设备节点是否可写、adb能否转发写入数据，均满足时打开事件直写通道"""
+        device = self._touch_screen.device
+        writable = self.run(f"if [ -w {device} ]; then echo yes; else echo no; fi")
+        if not writable or writable.strip() != "yes":
+            logger.warning("触摸屏设备节点不可写，点击操作将使用shell命令: %s", device)
+            return
+        
+        if not self._check_exec_in():
+            logger.warning("'adb exec-in'未能把数据写到设备端，点击操作将使用shell命令")
+            return
+        
+        abi = self.run("getprop ro.product.cpu.abi") or ""
+        writer = RawTouchWriter(self.device_id, self._touch_screen, "64" in abi)
+        if not writer.started():
+            logger.warning("触摸事件直写通道启动失败，点击操作将使用shell命令: %s", device)
+            writer.close()
+            return
+        
+        self._raw_writer = writer
+        logger.info("已打开触摸事件直写通道: %s", device)
+    
+    def _ensure_touch_probed(self):
+        """按需探测触摸屏（仅在启用sendevent或事件直写时）"""
+        if (Config.USE_SENDEVENT or Config.USE_RAW_EVENTS) and not self._touch_probed:
+            self._probe_touch_screen()
+    
+    def tap_command(self, x: int, y: int) -> str:
+        """
+        获取点击指定坐标的shell命令
+        
+        启用Config.USE_SENDEVENT且识别到触摸屏时返回sendevent命令序列，否则返回input tap。
+        """
+        self._ensure_touch_probed()
+        
+        command = self._tap_commands.get((x, y))
+        if command is not None:
+            return command
+        if Config.USE_SENDEVENT and self._touch_screen is not None:
+            return self._touch_screen.tap_command(x, y)
+        return f"input tap {x} {y}"
+    
+    def tap(self, x: int, y: int) -> bool:
+        """
+        点击指定坐标
+        
+        事件直写通道可用时直接写入事件数据，否则在shell中执行点击命令。
+        直写失败时关闭通道，此后改用shell命令。
+        
+        返回:
+            bool: 操作是否成功执行
+        """
+        if self.raw_tap(x, y):
+            return True
+        return self.run(self.tap_command(x, y)) is not None
+    
+    def raw_tap(self, x: int, y: int) -> bool:
+        """
+        通过事件直写通道点击指定坐标
+        
+        直写通道在首次调用时才打开，只使用shell命令的场景（如设备端批量执行）不会占用触摸屏设备节点。
+        
+        返回:
+            bool: 是否已通过直写通道完成点击；通道不可用或写入失败（此时关闭通道）时返回False
+        """
+        self._ensure_touch_probed()
+        
+        if not self._raw_writer_checked and Config.USE_RAW_EVENTS and self._touch_screen is not None:
+            self._raw_writer_checked = True
+            self._open_raw_writer()
+        
+        if self._raw_writer is None:
+            return False
+        if self._raw_writer.tap(x, y):
+            return True
+        
+        logger.warning("触摸事件直写失败，改用shell命令点击")
+        self._raw_writer.close()
+        self._raw_writer = None
+        return False
+    
+    def close(self):
+        """结束shell会话（同时关闭事件直写通道）"""
+        if self._raw_writer is not None:
+            self._raw_writer.close()
+            self._raw_writer = None
+        
+        if self.proc.poll() is None:
+            try:
+                self.proc.stdin.write(b"exit\n")
+                self.proc.stdin.close()
+                self.proc.wait(timeout=5)
+            except (OSError, ValueError, subprocess.TimeoutExpired):
+                self.proc.kill()
+
+
+atexit.register(AdbShell.close_all)
+
+
 # ==================== 设备操作函数 ====================
 def swipe_screen(start_x: int, start_y: int, end_x: int, end_y: int, 
-                duration: int = None) -> bool:
+                duration: int = None, device_id: Optional[str] = None) -> bool:
     """
     在屏幕上从起始坐标滑动到结束坐标
     
@@ -214,6 +910,7 @@ def swipe_screen(start_x: int, start_y: int, end_x: int, end_y: int,
         end_x (int): 结束点X坐标（像素）
         end_y (int): 结束点Y坐标（像素）
         duration (int, optional): 滑动持续时间（毫秒），默认使用配置值
+        device_id (str, optional): 目标设备ID，默认使用当前连接的设备
         
     返回:
         bool: 操作是否成功执行
@@ -228,24 +925,23 @@ def swipe_screen(start_x: int, start_y: int, end_x: int, end_y: int,
     if duration is None:
         duration = Config.DEFAULT_SWIPE_DURATION
     
-    # 参数验证
-    if not all(isinstance(coord, int) and coord >= 0 
-               for coord in [start_x, start_y, end_x, end_y]):
-        logging.error("滑动坐标必须为非负整数")
+    # 参数验证（预定义坐标已在Config中校验，这里只拦截明显无效的负坐标）
+    if start_x < 0 or start_y < 0 or end_x < 0 or end_y < 0:
+        logger.error("滑动坐标不能为负数")
         return False
     
     if duration <= 0:
-        logging.error("滑动持续时间必须为正数")
+        logger.error("滑动持续时间必须为正数")
         return False
     
-    command = f"shell input swipe {start_x} {start_y} {end_x} {end_y} {duration}"
-    logging.info(f"执行滑动操作: 从 ({start_x}, {start_y}) 到 ({end_x}, {end_y}), 持续时间: {duration}ms")
+    command = f"input swipe {start_x} {start_y} {end_x} {end_y} {duration}"
+    logger.info("执行滑动操作: 从 (%s, %s) 到 (%s, %s), 持续时间: %sms", start_x, start_y, end_x, end_y, duration)
     
-    result = run_adb_command(command)
+    result = AdbShell.instance(device_id).run(command)
     return result is not None
 
 
-def tap_screen(x: int, y: int) -> bool:
+def tap_screen(x: int, y: int, device_id: Optional[str] = None) -> bool:
     """
     点击屏幕上的指定坐标
     
@@ -255,6 +951,7 @@ def tap_screen(x: int, y: int) -> bool:
     参数:
         x (int): 点击位置的X坐标（像素）
         y (int): 点击位置的Y坐标（像素）
+        device_id (str, optional): 目标设备ID，默认使用当前连接的设备
         
     返回:
         bool: 操作是否成功执行
@@ -264,19 +961,22 @@ def tap_screen(x: int, y: int) -> bool:
         - 确保坐标在屏幕范围内，避免点击无效区域
         - 某些应用可能需要等待界面加载完成后再点击
     """
-    # 参数验证
-    if not isinstance(x, int) or not isinstance(y, int) or x < 0 or y < 0:
-        logging.error("点击坐标必须为非负整数")
+    # 参数验证（预定义坐标已在Config中校验，这里只拦截明显无效的负坐标）
+    if x < 0 or y < 0:
+        logger.error("点击坐标不能为负数")
         return False
     
-    command = f"shell input tap {x} {y}"
-    logging.info(f"执行点击操作: 坐标 ({x}, {y})")
+    logger.info("执行点击操作: 坐标 (%s, %s)", x, y)
     
-    result = run_adb_command(command)
-    return result is not None
+    return AdbShell.instance(device_id).tap(x, y)
+
 
+# input text的字符转义表: 空格转为%s（由设备端input命令还原为空格）
+# shell特殊字符统一由shlex.quote()整体加引号处理，此处无需逐个转义
+_ADB_TRANSLATE = str.maketrans({" ": "%s"})
 
-def input_text(text: str) -> bool:
+
+def input_text(text: str, device_id: Optional[str] = None) -> bool:
     """
     在当前焦点位置输入文本
     
@@ -285,6 +985,7 @@ def input_text(text: str) -> bool:
     
     参数:
         text (str): 要输入的文本内容
+        device_id (str, optional): 目标设备ID，默认使用当前连接的设备
         
     返回:
         bool: 操作是否成功执行
@@ -296,35 +997,41 @@ def input_text(text: str) -> bool:
         
     支持的特殊字符转义:
         - 空格 → %s
-        - 单引号 → \'
-        - 双引号 → \"
+        - 其余字符经shlex.quote()整体加引号，不会被设备端shell解析
+        - 不支持换行符，包含换行的文本会被拒绝
     """
     if not isinstance(text, str):
-        logging.error("输入文本必须为字符串类型")
+        logger.error("输入文本必须为字符串类型")
         return False
     
     if not text.strip():
-        logging.warning("输入文本为空，跳过操作")
+        logger.warning("输入文本为空，跳过操作")
         return True
     
-    # 对特殊字符进行转义处理
-    escaped_text = (
-        text.replace(" ", "%s")           # 空格转义
-            .replace("'", "\'")
-            .replace('"', '\\"')          # 双引号转义
-            .replace("&", "\\&")           # &符号转义
-            .replace("(", "\\(")           # 括号转义
-            .replace(")", "\\)")
-    )
+    # 换行会截断持久shell中的命令行，直接拒绝
+    if "\n" in text or "\r" in text:
+        logger.error("输入文本不能包含换行符")
+        return False
+    
+    # 空格转为%s后整体加引号，避免 ; | ` $ 等字符被设备端shell解析
+    escaped_text = text.translate(_ADB_TRANSLATE)
     
-    command = f"shell input text '{escaped_text}'"
-    logging.info(f"执行文本输入: '{text}' (转义后: '{escaped_text}')")
+    command = f"input text {shlex.quote(escaped_text)}"
+    logger.info("执行文本输入: '%s' (转义后: '%s')", text, escaped_text)
     
-    result = run_adb_command(command)
+    result = AdbShell.instance(device_id).run(command)
     return result is not None
 
 
-def press_key(keycode: int) -> bool:
+# 常用按键代码映射（用于日志显示）
+_KEY_NAMES: Mapping[int, str] = types.MappingProxyType({
+    3: "HOME", 4: "BACK", 26: "POWER", 24: "VOLUME_UP", 
+    25: "VOLUME_DOWN", 82: "MENU", 84: "SEARCH", 
+    66: "ENTER", 67: "DEL"
+})
+
+
+def press_key(keycode: int, device_id: Optional[str] = None) -> bool:
     """
     模拟按键操作
     
@@ -332,6 +1039,7 @@ def press_key(keycode: int) -> bool:
     
     参数:
         keycode (int): 按键代码，Android KeyEvent常量
+        device_id (str, optional): 目标设备ID，默认使用当前连接的设备
         
     返回:
         bool: 操作是否成功执行
@@ -353,36 +1061,178 @@ def press_key(keycode: int) -> bool:
         press_key(66)  # 按确认键
     """
     if not isinstance(keycode, int) or keycode < 0:
-        logging.error("按键代码必须为非负整数")
+        logger.error("按键代码必须为非负整数")
         return False
     
-    # 常用按键代码映射（用于日志显示）
-    key_names = {
-        3: "HOME", 4: "BACK", 26: "POWER", 24: "VOLUME_UP", 
-        25: "VOLUME_DOWN", 82: "MENU", 84: "SEARCH", 
-        66: "ENTER", 67: "DEL"
-    }
+    key_name = _KEY_NAMES.get(keycode, f"KEYCODE_{keycode}")
+    command = f"input keyevent {keycode}"
+    logger.info("执行按键操作: %s (keycode: %s)", key_name, keycode)
+    
+    result = AdbShell.instance(device_id).run(command)
+    return result is not None
+
+
+def wait_for_window(package: str, timeout: float = None, 
+                    device_id: Optional[str] = None) -> bool:
+    """
+    等待指定应用的窗口获得焦点
     
-    key_name = key_names.get(keycode, f"KEYCODE_{keycode}")
-    command = f"shell input keyevent {keycode}"
-    logging.info(f"执行按键操作: {key_name} (keycode: {keycode})")
+    在设备端轮询'dumpsys window'中的mCurrentFocus，窗口就绪后立即返回，
+    避免固定时长的等待。
     
-    result = run_adb_command(command)
+    参数:
+        package (str): 应用包名
+        timeout (float, optional): 超时时间（秒），默认使用配置值
+        device_id (str, optional): 目标设备ID，默认使用当前连接的设备
+        
+    返回:
+        bool: 窗口是否在超时前获得焦点
+        
+    示例:
+        wait_for_window("com.android.settings", 5.0)
+    """
+    if timeout is None:
+        timeout = Config.WINDOW_WAIT_TIMEOUT
+    
+    logger.info("等待窗口获得焦点: %s", package)
+    
+    # 设备端轮询自身有超时，主机端额外预留一些时间
+    script = build_window_wait_script(package, timeout)
+    result = AdbShell.instance(device_id).run(script, timeout=math.ceil(timeout) + 10)
     return result is not None
 
 
 # ==================== 高级操作函数 ====================
+def build_window_wait_script(package: str, timeout: float = None) -> str:
+    """
+    构建等待应用窗口获得焦点的shell命令
+    
+    以WINDOW_POLL_INTERVAL为间隔检查mCurrentFocus，超时后退出码为1。
+    命令包裹在{ }中，可以直接用'&&'与其他命令连接。
+    
+    参数:
+        package (str): 应用包名
+        timeout (float, optional): 超时时间（秒），默认使用配置值
+        
+    返回:
+        str: 可直接在设备shell中执行的命令
+    """
+    if timeout is None:
+        timeout = Config.WINDOW_WAIT_TIMEOUT
+    
+    max_polls = max(1, math.ceil(timeout / Config.WINDOW_POLL_INTERVAL))
+    pattern = shlex.quote(f"mCurrentFocus.*{package}")
+    return (
+        f"{{ n=0; while [ $n -lt {max_polls} ] && ! dumpsys window | grep -q {pattern}; do "
+        f"sleep {Config.WINDOW_POLL_INTERVAL:g}; n=$((n + 1)); done; [ $n -lt {max_polls} ]; }}"
+    )
+
+
+def build_click_script(coordinates: List[Tuple[int, int]], 
+                       interval: float = None, device_id: Optional[str] = None) -> str:
+    """
+    将一系列点击操作拼接为一条shell命令
+    
+    点击之间的等待改为设备端的sleep，整个点击序列只需一次shell调用。
+    各步骤以'&&'连接，任一步骤失败时后续步骤不再执行，退出码即为失败步骤的退出码。
+    
+    参数:
+        coordinates (List[Tuple[int, int]]): 点击坐标列表，每个元素为(x, y)坐标对
+        interval (float, optional): 点击间隔时间（秒），默认使用配置值
+        device_id (str, optional): 目标设备ID，默认使用当前连接的设备
+        
+    返回:
+        str: 可直接在设备shell中执行的命令
+        
+    示例:
+        build_click_script([(100, 200), (300, 400)], 1.0)
+        # 未使用sendevent时 -> "input tap 100 200 && sleep 1 && input tap 300 400"
+    """
+    if interval is None:
+        interval = Config.CLICK_INTERVAL
+    
+    shell = AdbShell.instance(device_id)
+    steps = []
+    for x, y in coordinates:
+        if steps:
+            steps.append(f"sleep {interval:g}")
+        steps.append(shell.tap_command(x, y))
+    
+    return " && ".join(steps)
+
+
+def build_sequence_script(device_id: Optional[str] = None) -> str:
+    """
+    构建一次完整自动化操作（滑动 + 等待动画 + 点击序列）的shell命令
+    
+    配置了Config.TARGET_PACKAGE时，滑动后等待该应用窗口获得焦点，否则固定等待ANIMATION_WAIT。
+    
+    参数:
+        device_id (str, optional): 目标设备ID，默认使用当前连接的设备
+        
+    返回:
+        str: 可直接在设备shell中执行的命令
+    """
+    if Config.TARGET_PACKAGE:
+        wait_step = build_window_wait_script(Config.TARGET_PACKAGE)
+    else:
+        wait_step = f"sleep {Config.ANIMATION_WAIT:g}"
+    
+    steps = [
+        Config.SWIPE_COMMAND,
+        wait_step,
+        build_click_script(Config.CLICK_COORDINATES, device_id=device_id)
+    ]
+    return " && ".join(steps)
+
+
+# 设备端循环脚本每完成一次操作输出的进度标记，格式为 __ITER__ <序号> <退出码>
+LOOP_PROGRESS_MARKER = "__ITER__"
+
+
+def build_loop_script(repeat_count: int, interval: float, 
+                      device_id: Optional[str] = None) -> str:
+    """
+    构建在设备端执行整个操作循环的shell脚本
+    
+    每次循环依次执行: 滑动及点击操作序列、输出进度标记、等待操作间隔。
+    
+    参数:
+        repeat_count (int): 循环次数
+        interval (float): 每次操作之间的间隔时间（秒）
+        device_id (str, optional): 目标设备ID，默认使用当前连接的设备
+        
+    返回:
+        str: 完整的shell脚本内容
+    """
+    sequence = build_sequence_script(device_id)
+    return (
+        "i=1\n"
+        f"while [ $i -le {repeat_count} ]; do\n"
+        f"    if {sequence}; then rc=0; else rc=$?; fi\n"
+        f"    echo \"{LOOP_PROGRESS_MARKER} $i $rc\"\n"
+        f"    if [ $i -lt {repeat_count} ]; then sleep {interval:g}; fi\n"
+        "    i=$((i + 1))\n"
+        "done\n"
+    )
+
+
 def perform_click_sequence(coordinates: List[Tuple[int, int]], 
-                          interval: float = None) -> bool:
+                          interval: float = None, batched: bool = False,
+                          device_id: Optional[str] = None) -> bool:
     """
     执行一系列点击操作
     
     按顺序执行多个点击操作，每次点击之间有指定的时间间隔。
     适用于需要连续点击多个位置的自动化场景。
+    逐次点击时通过asyncio.run()执行perform_click_sequence_async()，
+    在已运行的事件循环中请直接await perform_click_sequence_async()。
     
     参数:
         coordinates (List[Tuple[int, int]]): 点击坐标列表，每个元素为(x, y)坐标对
         interval (float, optional): 点击间隔时间（秒），默认使用配置值
+        batched (bool): 是否将整个序列合并为一次shell调用（等待在设备端完成），默认False
+        device_id (str, optional): 目标设备ID，默认使用当前连接的设备
         
     返回:
         bool: 所有点击操作是否都成功执行
@@ -391,33 +1241,135 @@ def perform_click_sequence(coordinates: List[Tuple[int, int]],
         # 依次点击三个按钮
         coords = [(100, 200), (300, 400), (500, 600)]
         perform_click_sequence(coords, 1.0)
+        
+        # 合并为一次shell调用执行
+        perform_click_sequence(coords, 1.0, batched=True)
     """
     if interval is None:
         interval = Config.CLICK_INTERVAL
     
     if not coordinates:
-        logging.warning("点击坐标列表为空")
+        logger.warning("点击坐标列表为空")
         return True
     
-    logging.info(f"开始执行点击序列，共 {len(coordinates)} 个点击操作")
+    if batched:
+        logger.info("开始执行点击序列，共 %s 个点击操作", len(coordinates))
+        script = build_click_script(coordinates, interval, device_id)
+        if AdbShell.instance(device_id).run(script) is None:
+            logger.error("点击序列执行失败")
+            return False
+        logger.info("点击序列完成 (%s/%s)", len(coordinates), len(coordinates))
+        return True
+    
+    import asyncio
+    return asyncio.run(perform_click_sequence_async(coordinates, interval, device_id))
+
+
+async def perform_click_sequence_async(coordinates: List[Tuple[int, int]], 
+                                       interval: float = None, 
+                                       device_id: Optional[str] = None) -> bool:
+    """
+    以流水线方式异步执行一系列点击操作
+    
+    每次点击的命令写入shell后不等待其完成，立即开始点击间隔的等待，间隔结束后再读取执行结果。
+    设备端执行点击的时间与间隔等待重叠，每次点击的耗时由"执行时间 + 间隔"缩短为二者中的较大值。
+    事件直写通道可用时点击直接写入事件数据，无需读取执行结果。
+    
+    参数:
+        coordinates (List[Tuple[int, int]]): 点击坐标列表，每个元素为(x, y)坐标对
+        interval (float, optional): 点击间隔时间（秒），默认使用配置值
+        device_id (str, optional): 目标设备ID，默认使用当前连接的设备
+        
+    返回:
+        bool: 所有点击操作是否都成功执行
+        
+    示例:
+        await perform_click_sequence_async([(100, 200), (300, 400)], 1.0)
+    """
+    import asyncio
+    
+    if interval is None:
+        interval = Config.CLICK_INTERVAL
+    
+    if not coordinates:
+        logger.warning("点击坐标列表为空")
+        return True
+    
+    # 预定义坐标已在Config中校验，其他坐标在开始前统一检查
+    if coordinates is not Config.CLICK_COORDINATES and any(x < 0 or y < 0 for x, y in coordinates):
+        logger.error("点击坐标不能为负数")
+        return False
+    
+    logger.info("开始执行点击序列，共 %s 个点击操作", len(coordinates))
+    
+    # 首次获取点击命令时会探测触摸屏，涉及阻塞的shell调用
+    shell = AdbShell.instance(device_id)
+    commands = await asyncio.to_thread(lambda: [shell.tap_command(x, y) for x, y in coordinates])
     
     success_count = 0
-    for i, (x, y) in enumerate(coordinates, 1):
-        logging.info(f"执行第 {i}/{len(coordinates)} 次点击")
+    for i, ((x, y), command) in enumerate(zip(coordinates, commands), 1):
+        logger.info("执行第 %s/%s 次点击", i, len(coordinates))
+        
+        # 上一次点击超时会关闭会话，每次点击前重新获取（会话已关闭时自动重建）
+        shell = AdbShell.instance(device_id)
+        
+        # 通过直写通道完成的点击无需读取结果；shell命令先写入，间隔等待结束后再读取结果
+        # 直写通道首次使用时才打开（涉及阻塞的shell调用），写入也可能阻塞，因此放在工作线程中执行
+        written = Config.USE_RAW_EVENTS and await asyncio.to_thread(shell.raw_tap, x, y)
+        sent = not written and shell.send(command)
+        
+        if i < len(coordinates):  # 最后一次点击后不需要等待
+            await asyncio.sleep(interval)
+        
+        if written:
+            success = True
+        else:
+            success = sent and await asyncio.to_thread(shell.wait_result, command) is not None
+        
+        if not success and Config.CLICK_MAX_RETRIES > 0:
+            await asyncio.sleep(Config.CLICK_RETRY_INTERVAL)
+            # 重试通过tap_screen进行，每次尝试都重新获取会话
+            success = await asyncio.to_thread(retry_bool, tap_screen, Config.CLICK_MAX_RETRIES, 
+                                              Config.CLICK_RETRY_INTERVAL, x, y, device_id)
         
-        if tap_screen(x, y):
+        if success:
             success_count += 1
-            if i < len(coordinates):  # 最后一次点击后不需要等待
-                time.sleep(interval)
         else:
-            logging.error(f"第 {i} 次点击失败: ({x}, {y})")
+            logger.error("第 %s 次点击失败: (%s, %s)", i, x, y)
     
     success_rate = success_count / len(coordinates)
-    logging.info(f"点击序列完成，成功率: {success_rate:.1%} ({success_count}/{len(coordinates)})")
+    logger.info("点击序列完成，成功率: %.1f%% (%s/%s)", success_rate * 100, success_count, len(coordinates))
     
     return success_count == len(coordinates)
 
 
+def retry_bool(operation_func, attempts: int, interval: float, *args, **kwargs) -> bool:
+    """
+    重试返回bool的操作函数
+    
+    适用于自身已处理错误、只通过返回值表示成败的操作（如点击、滑动、按键），
+    不捕获异常、不输出每次尝试的日志，是wait_and_retry的轻量版本。
+    
+    参数:
+        operation_func: 要执行的操作函数，返回值为真表示成功
+        attempts (int): 最多尝试次数（包括第一次）
+        interval (float): 两次尝试之间的间隔时间（秒）
+        *args, **kwargs: 传递给操作函数的参数
+        
+    返回:
+        bool: 操作是否最终成功执行
+        
+    示例:
+        retry_bool(tap_screen, 3, 0.5, 500, 800)
+    """
+    for attempt in range(attempts):
+        if operation_func(*args, **kwargs):
+            return True
+        if attempt < attempts - 1:
+            time.sleep(interval)
+    return False
+
+
 def wait_and_retry(operation_func, max_retries: int = 3, 
                   retry_interval: float = 1.0, *args, **kwargs) -> bool:
     """
@@ -425,6 +1377,8 @@ def wait_and_retry(operation_func, max_retries: int = 3,
     
     对指定的操作函数进行重试执行，直到成功或达到最大重试次数。
     适用于网络不稳定或设备响应较慢的情况。
+    与retry_bool不同，该函数会捕获操作抛出的异常并记录每次尝试的结果，
+    适用于可能抛出异常的操作。
     
     参数:
         operation_func: 要执行的操作函数
@@ -440,125 +1394,309 @@ def wait_and_retry(operation_func, max_retries: int = 3,
             result = operation_func(*args, **kwargs)
             if result:
                 if attempt > 0:
-                    logging.info(f"操作在第 {attempt + 1} 次尝试后成功")
+                    logger.info("操作在第 %s 次尝试后成功", attempt + 1)
                 return True
         except Exception as e:
-            logging.warning(f"第 {attempt + 1} 次尝试失败: {e}")
+            logger.warning("第 %s 次尝试失败: %s", attempt + 1, e)
         
         if attempt < max_retries:
-            logging.info(f"第 {attempt + 1} 次尝试失败，{retry_interval}秒后重试...")
+            logger.info("第 %s 次尝试失败，%s秒后重试...", attempt + 1, retry_interval)
             time.sleep(retry_interval)
     
-    logging.error(f"操作在 {max_retries + 1} 次尝试后仍然失败")
+    logger.error("操作在 %s 次尝试后仍然失败", max_retries + 1)
     return False
 
-# 优化2: 添加网络连接检查函数，增强错误处理 (2025-09-25)
-def check_network_connection(host: str = "8.8.8.8", port: int = 53, timeout: int = 3) -> bool:
-    """
-    检查网络连接状态
-    
-    参数:
-        host (str): 要连接的主机地址，默认为Google DNS
-        port (int): 端口号，默认为53(DNS端口)
-        timeout (int): 超时时间(秒)
-        
-    返回:
-        bool: 网络是否连通
-    """
-    import socket
-    try:
-        socket.setdefaulttimeout(timeout)
-        socket.socket(socket.AF_INET, socket.SOCK_STREAM).connect((host, port))
-        return True
-    except Exception:
-        return False
-
 
 # ==================== 主要业务逻辑 ====================
-def execute_automation_sequence() -> bool:
+def execute_automation_sequence(device_id: Optional[str] = None) -> bool:
     """
     执行自动化操作序列
     
     这是脚本的核心业务逻辑，定义了具体要执行的自动化操作步骤。
     可以根据实际需求修改这个函数中的操作序列。
     
+    参数:
+        device_id (str, optional): 目标设备ID，默认使用当前连接的设备
+        
     返回:
         bool: 整个操作序列是否成功完成
         
     操作步骤:
-        1. 等待设备准备就绪
-        2. 执行屏幕滑动操作
-        3. 等待动画完成
-        4. 执行一系列点击操作
+        1. 执行屏幕滑动操作
+        2. 等待动画完成（或等待目标应用窗口获得焦点）
+        3. 执行一系列点击操作
+        
+    注意:
+        - 所有步骤合并为一次shell调用，动画和点击间隔的等待在设备端完成
+        - 设备就绪由程序启动时的'adb wait-for-device'保证
     """
     try:
-        # 步骤1: 等待设备准备就绪
-        logging.info("等待设备准备就绪...")
-        time.sleep(Config.DEVICE_READY_WAIT)
-        
-        # 步骤2: 执行滑动操作（从屏幕右侧向左滑动）
-        logging.info("执行滑动操作...")
-        start_coords = Config.SWIPE_COORDINATES['start']
-        end_coords = Config.SWIPE_COORDINATES['end']
-        
-        if not swipe_screen(*start_coords, *end_coords):
-            logging.error("滑动操作失败")
-            return False
-        
-        # 步骤3: 等待动画完成
-        logging.info("等待动画完成...")
-        time.sleep(Config.ANIMATION_WAIT)
-        
-        # 步骤4: 执行点击序列
-        logging.info("执行点击操作序列...")
-        if not perform_click_sequence(Config.CLICK_COORDINATES):
-            logging.error("点击序列执行失败")
+        # 滑动（从屏幕右侧向左）、等待动画、执行点击序列
+        logger.info("执行滑动及点击操作序列...")
+        script = build_sequence_script(device_id)
+        if AdbShell.instance(device_id).run(script) is None:
+            logger.error("操作序列执行失败")
             return False
         
-        logging.info("自动化操作序列执行完成!")
+        logger.info("自动化操作序列执行完成!")
         return True
         
     except KeyboardInterrupt:
-        logging.info("操作被用户中断")
+        logger.info("操作被用户中断")
         return False
     except Exception as e:
-        logging.error(f"执行自动化序列时发生错误: {e}")
+        logger.error("执行自动化序列时发生错误: %s", e)
         return False
 
 
-def main() -> bool:
+def main(device_id: Optional[str] = None) -> bool:
     """
     主函数 - 程序入口点
     
     负责初始化环境、检查设备连接状态，并执行自动化操作序列。
     包含完整的错误处理和状态检查逻辑。
     
+    参数:
+        device_id (str, optional): 目标设备ID，默认使用当前连接的设备
+        
     返回:
         bool: 主要操作是否成功完成
+        
+    注意:
+        设备连接状态只在尚未确认或上次ADB命令失败后才重新检查，
+        避免每次循环都执行一次'adb devices'
     """
     # 检查设备连接状态
-    if not check_device_connected():
-        logging.error("设备连接检查失败，程序退出")
-        return False
+    with _checked_devices_lock:
+        checked = device_id in _checked_devices
+    if not checked:
+        if not check_device_connected(device_id):
+            logger.error("设备连接检查失败，程序退出")
+            return False
+        with _checked_devices_lock:
+            _checked_devices.add(device_id)
     
     # 执行自动化操作序列
-    return execute_automation_sequence()
+    return execute_automation_sequence(device_id)
+
+
+def log_iteration_result(device_id: str, index: int, repeat_count: int, success: bool, 
+                         success_counts: Dict[str, int]):
+    """记录单次操作的结果并显示总体进度（index从1开始）"""
+    if success:
+        success_counts[device_id] += 1
+        logger.info("[%s] 第 %s 次操作成功完成", device_id, index)
+    else:
+        logger.error("[%s] 第 %s 次操作执行失败", device_id, index)
+    
+    # 计算并显示进度
+    progress = index / repeat_count * 100
+    logger.info("[%s] 总体进度: %.1f%% (%s/%s)", device_id, progress, index, repeat_count)
+
+
+async def run_device_batch(device_id: str, repeat_count: int, interval: float, 
+                           success_counts: Dict[str, int]):
+    """
+    在设备端执行整个操作循环
+    
+    将整个循环生成为shell脚本，push到设备后通过一次'adb shell sh'执行，
+    循环过程中主机与设备之间不再有逐次的命令往返。
+    脚本每完成一次操作输出一行进度标记，主机据此统计成功次数并显示进度。
+    
+    参数:
+        device_id (str): 目标设备ID
+        repeat_count (int): 循环次数
+        interval (float): 每次操作之间的间隔时间（秒）
+        success_counts (Dict[str, int]): 各设备成功次数，执行过程中实时更新
+    """
+    import asyncio
+    import tempfile
+    
+    # 生成脚本时会探测触摸屏，涉及阻塞的shell调用
+    script = await asyncio.to_thread(build_loop_script, repeat_count, interval, device_id)
+    
+    # 以二进制方式写入本地临时文件，保证换行符为\n
+    fd, local_path = tempfile.mkstemp(suffix=".sh")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(script.encode('utf-8'))
+        pushed = await asyncio.to_thread(
+            run_adb_command, ["-s", device_id, "push", local_path, Config.DEVICE_SCRIPT_PATH]
+        )
+    finally:
+        os.remove(local_path)
+    
+    if pushed is None:
+        logger.error("[%s] 循环脚本推送失败", device_id)
+        return
+    
+    logger.info("[%s] 在设备端执行 %s 次操作循环...", device_id, repeat_count)
+    proc = await asyncio.create_subprocess_exec(
+        "adb", "-s", device_id, "shell", "sh", Config.DEVICE_SCRIPT_PATH,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL
+    )
+    
+    reported = 0
+    try:
+        async for raw_line in proc.stdout:
+            fields = raw_line.decode('utf-8', errors='replace').split()
+            if len(fields) != 3 or fields[0] != LOOP_PROGRESS_MARKER:
+                continue
+            
+            reported += 1
+            index, exit_code = int(fields[1]), fields[2]
+            if exit_code != "0":
+                logger.error("[%s] 操作序列执行失败 (退出码: %s)", device_id, exit_code)
+            log_iteration_result(device_id, index, repeat_count, exit_code == "0", success_counts)
+        
+        await proc.wait()
+        
+        # 脚本未能启动、设备端脚本缺失或连接中途断开时，进度标记会少于循环次数
+        if proc.returncode != 0:
+            logger.error("[%s] 设备端循环脚本异常退出 (退出码: %s)", device_id, proc.returncode)
+        if reported < repeat_count:
+            logger.error("[%s] 设备端循环提前结束，仅完成 %s/%s 次操作", 
+                         device_id, reported, repeat_count)
+    finally:
+        # 被中断时结束adb进程，设备端脚本随连接关闭而终止
+        if proc.returncode is None:
+            proc.kill()
+
+
+async def run_device(device_id: str, repeat_count: int, interval: float, 
+                     success_counts: Dict[str, int], batch: bool = True):
+    """
+    在单个设备上循环执行自动化操作
+    
+    每个设备使用各自的持久化shell会话（'adb -s <设备ID> shell'）。
+    阻塞的shell调用放在工作线程中执行，多个设备的循环因此可以并发进行。
+    
+    参数:
+        device_id (str): 目标设备ID
+        repeat_count (int): 循环次数
+        interval (float): 每次操作之间的间隔时间（秒）
+        success_counts (Dict[str, int]): 各设备成功次数，执行过程中实时更新
+        batch (bool): 是否在设备端执行整个循环，为False时由主机逐次发送命令，默认True
+    """
+    import asyncio
+    
+    success_counts[device_id] = 0
+    
+    # 等待设备就绪（代替每次操作前的固定等待）
+    logger.info("[%s] 等待设备就绪...", device_id)
+    if await asyncio.to_thread(run_adb_command, ["-s", device_id, "wait-for-device"]) is None:
+        logger.error("[%s] 设备未就绪，跳过该设备", device_id)
+        return
+    
+    if batch:
+        await run_device_batch(device_id, repeat_count, interval, success_counts)
+        return
+    
+    for i in range(repeat_count):
+        logger.info("\n===== [%s] 执行第 %s/%s 次操作 =====", device_id, i+1, repeat_count)
+        
+        success = await asyncio.to_thread(main, device_id)
+        log_iteration_result(device_id, i + 1, repeat_count, success, success_counts)
+        
+        # 每次操作之间的间隔（最后一次循环后不需要等待）
+        if i < repeat_count - 1:
+            await asyncio.sleep(interval)
+
+
+async def run_all_devices(device_ids: List[str], repeat_count: int, interval: float, 
+                          success_counts: Dict[str, int], batch: bool = True):
+    """在所有指定设备上并发执行自动化操作循环"""
+    import asyncio
+    await asyncio.gather(*(run_device(device_id, repeat_count, interval, success_counts, batch)
+                           for device_id in device_ids))
 
 
 # ==================== 程序入口 ====================
-# 优化3: 使用argparse改进命令行参数处理 (2025-09-25)
-def parse_arguments():
-    """解析命令行参数"""
-    parser = argparse.ArgumentParser(description="ADB自动化控制脚本")
-    parser.add_argument("repeat_count", nargs="?", type=int, default=Config.DEFAULT_REPEAT_COUNT,
-                        help="循环次数 (默认: %(default)s)")
-    parser.add_argument("--interval", type=float, default=Config.OPERATION_INTERVAL,
-                        help="操作间隔时间(秒) (默认: %(default)s)")
-    parser.add_argument("--log-file", type=str, default=None,
-                        help="日志文件路径 (默认: 输出到控制台)")
-    parser.add_argument("--device-id", type=str, default=None,
-                        help="指定设备ID (默认: 使用当前连接的设备)")
-    return parser.parse_args()
+USAGE = f"""用法: python adb_control.py [循环次数] [选项]
+
+参数:
+  循环次数              每个设备的操作循环次数 (默认: {Config.DEFAULT_REPEAT_COUNT})
+
+选项:
+  --interval=秒数       操作间隔时间 (默认: {Config.OPERATION_INTERVAL})
+  --log-file=路径       日志文件路径 (默认: 输出到控制台)
+  --device-id=设备ID    指定设备ID (默认: 在所有可用设备上并发执行)
+  --no-batch           由主机逐次发送每次操作的命令，而不是在设备端执行整个循环
+  -h, --help           显示帮助信息
+"""
+
+
+def _usage_error(message: str):
+    """输出参数错误信息和用法说明后退出"""
+    print(f"错误: {message}\n\n{USAGE}", file=sys.stderr)
+    sys.exit(2)
+
+
+def parse_arguments(argv: List[str] = None) -> types.SimpleNamespace:
+    """
+    解析命令行参数
+    
+    参数格式简单固定，直接解析sys.argv，省去导入argparse的启动开销。
+    带值的选项支持"--interval=0.5"和"--interval 0.5"两种写法。
+    
+    参数:
+        argv (List[str], optional): 命令行参数列表（不含程序名），默认使用sys.argv[1:]
+        
+    返回:
+        SimpleNamespace: 包含repeat_count、interval、log_file、device_id、no_batch属性
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    
+    args = types.SimpleNamespace(
+        repeat_count=Config.DEFAULT_REPEAT_COUNT,
+        interval=Config.OPERATION_INTERVAL,
+        log_file=None,
+        device_id=None,
+        no_batch=False
+    )
+    
+    # 带值的选项及对应的属性名
+    value_options = {"--interval": "interval", "--log-file": "log_file", "--device-id": "device_id"}
+    repeat_count_given = False
+    
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        i += 1
+        
+        if arg in ("-h", "--help"):
+            print(USAGE)
+            sys.exit(0)
+        
+        if arg == "--no-batch":
+            args.no_batch = True
+            continue
+        
+        name, has_value, value = arg.partition("=")
+        if name in value_options:
+            if not has_value:
+                if i >= len(argv):
+                    _usage_error(f"选项 {name} 缺少参数值")
+                value = argv[i]
+                i += 1
+            setattr(args, value_options[name], value)
+        elif not arg.startswith("-") and not repeat_count_given:
+            try:
+                args.repeat_count = int(arg)
+            except ValueError:
+                _usage_error(f"循环次数必须为整数: {arg}")
+            repeat_count_given = True
+        else:
+            _usage_error(f"无法识别的参数: {arg}")
+    
+    try:
+        args.interval = float(args.interval)
+    except ValueError:
+        _usage_error(f"操作间隔必须为数字: {args.interval}")
+    
+    return args
 
 # 优化4: 改进日志配置，支持文件输出 (2025-09-25)
 def setup_logging_with_file(log_file: str = None):
@@ -570,17 +1708,20 @@ def setup_logging_with_file(log_file: str = None):
     """
     handlers = []
     
-    # 控制台处理器
+    # 所有处理器共用同一个格式化器
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', 
+                                  datefmt='%Y-%m-%d %H:%M:%S')
+    
+    # 控制台处理器（经缓冲后批量输出，ERROR日志立即输出，程序退出时输出剩余日志）
     console_handler = logging.StreamHandler()
-    console_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', 
-                                                  datefmt='%Y-%m-%d %H:%M:%S'))
-    handlers.append(console_handler)
+    console_handler.setFormatter(formatter)
+    handlers.append(BufferedLogHandler(Config.LOG_BUFFER_CAPACITY, Config.LOG_FLUSH_INTERVAL,
+                                       target=console_handler))
     
     # 文件处理器
     if log_file:
         file_handler = logging.FileHandler(log_file, encoding='utf-8')
-        file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', 
-                                                   datefmt='%Y-%m-%d %H:%M:%S'))
+        file_handler.setFormatter(formatter)
         handlers.append(file_handler)
     
     logging.basicConfig(
@@ -597,60 +1738,62 @@ if __name__ == "__main__":
     
     # 验证循环次数参数
     if args.repeat_count <= 0:
-        logging.error("循环次数必须为正整数")
+        logger.error("循环次数必须为正整数")
+        sys.exit(1)
+    
+    # 确定目标设备: 指定设备ID时只操作该设备，否则并发操作所有可用设备
+    if args.device_id:
+        device_ids = [args.device_id] if check_device_connected(args.device_id) else []
+    else:
+        device_ids = get_available_devices()
+    
+    if not device_ids:
+        logger.error("设备连接检查失败，程序退出")
         sys.exit(1)
+    _checked_devices.update(device_ids)
     
     # 显示执行计划
-    logging.info(f"ADB自动化控制脚本启动")
-    logging.info(f"计划执行 {args.repeat_count} 次操作循环")
-    logging.info(f"操作间隔: {args.interval} 秒")
+    logger.info("ADB自动化控制脚本启动")
+    logger.info("计划执行 %s 次操作循环", args.repeat_count)
+    logger.info("操作间隔: %s 秒", args.interval)
     if args.log_file:
-        logging.info(f"日志文件: {args.log_file}")
-    if args.device_id:
-        logging.info(f"目标设备: {args.device_id}")
+        logger.info("日志文件: %s", args.log_file)
+    logger.info("目标设备: %s", ', '.join(device_ids))
+    logger.info("执行方式: %s", '主机逐次发送' if args.no_batch else '设备端批量执行')
     
-    # 执行主循环
-    success_count = 0
+    # 执行主循环（多个设备并发执行）
+    success_counts = {}
     start_time = time.time()
     
+    import asyncio
     try:
-        for i in range(args.repeat_count):
-            logging.info(f"\n===== 执行第 {i+1}/{args.repeat_count} 次操作 =====")
-            
-            if main():
-                success_count += 1
-                logging.info(f"第 {i+1} 次操作成功完成")
-            else:
-                logging.error(f"第 {i+1} 次操作执行失败")
-            
-            # 计算并显示进度
-            progress = (i + 1) / args.repeat_count * 100
-            logging.info(f"总体进度: {progress:.1f}% ({i+1}/{args.repeat_count})")
-            
-            # 每次操作之间的间隔（最后一次循环后不需要等待）
-            if i < args.repeat_count - 1:
-                time.sleep(args.interval)
-                
+        asyncio.run(run_all_devices(device_ids, args.repeat_count, args.interval, 
+                                    success_counts, batch=not args.no_batch))
     except KeyboardInterrupt:
-        logging.info("\n程序被用户中断!")
+        logger.info("\n程序被用户中断!")
     except Exception as e:
-        logging.error(f"\n程序执行过程中发生未知错误: {e}")
+        logger.error("\n程序执行过程中发生未知错误: %s", e)
         raise
     
     # 显示执行统计
     end_time = time.time()
     total_time = end_time - start_time
-    success_rate = success_count / args.repeat_count * 100 if args.repeat_count > 0 else 0
-    
-    logging.info("\n" + "=" * 50)
-    logging.info("程序执行完毕 - 统计信息:")
-    logging.info(f"总执行时间: {total_time:.2f} 秒")
-    logging.info(f"计划执行次数: {args.repeat_count}")
-    logging.info(f"成功执行次数: {success_count}")
-    logging.info(f"成功率: {success_rate:.1f}%")
-    logging.info(f"平均每次操作耗时: {total_time/args.repeat_count:.2f} 秒")
-    logging.info("=" * 50)
+    total_count = args.repeat_count * len(device_ids)
+    success_count = sum(success_counts.values())
+    success_rate = success_count / total_count * 100 if total_count > 0 else 0
+    
+    logger.info("\n" + "=" * 50)
+    logger.info("程序执行完毕 - 统计信息:")
+    logger.info("总执行时间: %.2f 秒", total_time)
+    logger.info("设备数量: %s", len(device_ids))
+    logger.info("计划执行次数: %s", total_count)
+    logger.info("成功执行次数: %s", success_count)
+    for device_id in device_ids:
+        logger.info("  - 设备 %s: %s/%s", device_id, success_counts.get(device_id, 0), args.repeat_count)
+    logger.info("成功率: %.1f%%", success_rate)
+    logger.info("平均每次操作耗时: %.2f 秒", total_time/args.repeat_count)
+    logger.info("=" * 50)
     
     # 根据成功率设置退出代码
     exit_code = 0 if success_rate >= 90 else 1
-    sys.exit(exit_code)
\ No newline at end of file
+    sys.exit(exit_code)